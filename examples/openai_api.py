@@ -1,16 +1,19 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+from collections import OrderedDict
 from typing import Dict
-import json
+import orjson
 import time
 import uuid
 import litellm
 import asyncio
 import logging
 import os
+import httpx
 import uvicorn
-from fastapi import FastAPI, Request, Response, Depends, HTTPException
+from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from unifai.agent import Agent
@@ -31,14 +34,19 @@ class OpenAIAPI():
     ):
         self.host = host
         self.port = port
-        self.app = FastAPI()
+        self.app = FastAPI(default_response_class=ORJSONResponse)
         self.security = HTTPBearer(auto_error=False)
         self.response_queues: Dict[str, asyncio.Queue] = {}
         self.server = None
         self.server_task = None
         self.add_system_prompt = add_system_prompt
+        self.system_prompt = Agent("").get_prompt("agent.system") if add_system_prompt else None
         self.model = model
         self.api_key = api_key
+        # Tools clients keyed by API key, all sending through one shared HTTP connection pool
+        self.http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100))
+        self._tools: OrderedDict[str, Tools] = OrderedDict()
+        self.max_tools_clients = 128
 
         self._setup_routes()
 
@@ -49,31 +57,48 @@ class OpenAIAPI():
                 raise HTTPException(status_code=401, detail="Unauthorized")
 
             try:
-                request_data = await request.json()
+                request_data = orjson.loads(await request.body())
 
                 messages = []
 
-                if self.add_system_prompt:
-                    system_prompt = Agent("").get_prompt("agent.system")
-                    messages.append({"content": system_prompt, "role": "system"})
+                model = request_data.get("model", self.model)
+                cache_control = model.lower().startswith("anthropic")
 
-                messages.extend(request_data.get("messages", []))
+                if self.system_prompt:
+                    if cache_control:
+                        messages.append({
+                            "content": [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}],
+                            "role": "system",
+                        })
+                    else:
+                        messages.append({"content": self.system_prompt, "role": "system"})
 
-                tools = Tools(api_key=(credentials.credentials or self.api_key) if credentials else self.api_key)
+                messages.extend(request_data.get("messages", []))
 
-                model = request_data.get("model", self.model)
+                tools = self.get_tools_client((credentials.credentials or self.api_key) if credentials else self.api_key)
 
                 completion_id = f"chatcmpl-{uuid.uuid4()}"
                 prompt_tokens = 0
                 completion_tokens = 0
                 finish_reason = ""
 
+                tool_defs = await tools.get_tools(cache_control=cache_control)
+
+                if request_data.get("stream"):
+                    return StreamingResponse(
+                        self._stream_completion(completion_id, model, messages, tools, tool_defs),
+                        media_type="text/event-stream",
+                    )
+
                 while True:
+                    cache_marker = self._add_cache_control(messages[-1]) if cache_control else None
                     response = await litellm.acompletion(
                         model=model,
                         messages=messages,
-                        tools=await tools.get_tools(),
+                        tools=tool_defs,
                     )
+                    if cache_marker:
+                        del cache_marker["cache_control"]
 
                     try:
                         prompt_tokens += response.usage.prompt_tokens # type: ignore
@@ -83,12 +108,12 @@ class OpenAIAPI():
                         logger.error(f"Error calculating cost: {e}")
 
                     message = response.choices[0].message # type: ignore
-                    messages.append(message.model_dump(mode="json"))
+                    messages.append(message)
 
                     if not message.tool_calls:
                         break
 
-                    results = await tools.call_tools(message.tool_calls) # type: ignore
+                    results = await tools.call_tools(message.tool_calls, concurrency=10) # type: ignore
 
                     if len(results) == 0:
                         break
@@ -102,7 +127,7 @@ class OpenAIAPI():
                     "model": model,
                     "choices": [{
                         "index": 0,
-                        "message": messages[-1],
+                        "message": message.model_dump(mode="json"),
                         "finish_reason": finish_reason,
                     }],
                     "usage": {
@@ -113,11 +138,115 @@ class OpenAIAPI():
                     "system_fingerprint": system_fingerprint,
                 }
 
-                return Response(content=json.dumps(response_data), media_type="application/json")
+                return ORJSONResponse(response_data)
             except Exception as e:
                 logger.error(f"Error in chat_completions: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+    @staticmethod
+    def _add_cache_control(message) -> dict | None:
+        """
+        Mark the end of the conversation so far as an Anthropic prompt cache breakpoint, letting the
+        next tool loop turn reuse the cached prefix. Returns the marked content block so the marker
+        can be removed again after the call, keeping the number of breakpoints within the limit of 4.
+        """
+        if not isinstance(message, dict):
+            return None
+        content = message.get("content")
+        if isinstance(content, str) and content:
+            content = [{"type": "text", "text": content}]
+            message["content"] = content
+        if isinstance(content, list) and content and isinstance(content[-1], dict):
+            content[-1]["cache_control"] = {"type": "ephemeral"}
+            return content[-1]
+        return None
+
+    async def _stream_completion(self, completion_id: str, model: str, messages: list, tools: Tools, tool_defs: list):
+        """
+        Run the same tool loop as the non-streaming path, forwarding assistant text to the client
+        as server-sent chat.completion.chunk events while each model turn is still being generated.
+        """
+        created = int(time.time())
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": delta,
+                    "finish_reason": finish_reason,
+                }],
+                "system_fingerprint": system_fingerprint,
+            }
+            return f"data: {orjson.dumps(data).decode()}\n\n"
+
+        finish_reason = "stop"
+        try:
+            yield chunk({"role": "assistant"})
+
+            cache_control = model.lower().startswith("anthropic")
+
+            while True:
+                cache_marker = self._add_cache_control(messages[-1]) if cache_control else None
+                response = await litellm.acompletion(
+                    model=model,
+                    messages=messages,
+                    tools=tool_defs,
+                    stream=True,
+                )
+
+                chunks = []
+                async for part in response: # type: ignore
+                    chunks.append(part)
+                    if part.choices and part.choices[0].delta.content:
+                        yield chunk({"content": part.choices[0].delta.content})
+
+                if cache_marker:
+                    del cache_marker["cache_control"]
+
+                # tool calls arrive as fragments, rebuild the full message before acting on it
+                full_response = litellm.stream_chunk_builder(chunks, messages=messages)
+                if full_response is None:
+                    break
+
+                finish_reason = full_response.choices[0].finish_reason or finish_reason # type: ignore
+                message = full_response.choices[0].message # type: ignore
+                messages.append(message)
+
+                if not message.tool_calls:
+                    break
+
+                results = await tools.call_tools(message.tool_calls, concurrency=10) # type: ignore
+
+                if len(results) == 0:
+                    break
+
+                messages.extend(results)
+        except Exception as e:
+            logger.error(f"Error in streaming chat_completions: {str(e)}")
+            # The status is already sent, report the failure as an error event like OpenAI does
+            # instead of a "stop" chunk that would look like a complete, if short, answer
+            error = {"error": {"message": f"Internal server error: {str(e)}", "type": "server_error"}}
+            yield f"data: {orjson.dumps(error).decode()}\n\n"
+            return
+
+        yield chunk({}, finish_reason)
+        yield "data: [DONE]\n\n"
+
+    def get_tools_client(self, api_key: str) -> Tools:
+        tools = self._tools.get(api_key)
+        if tools is None:
+            tools = Tools(api_key=api_key, http_client=self.http_client)
+            self._tools[api_key] = tools
+            if len(self._tools) > self.max_tools_clients:
+                self._tools.popitem(last=False)
+        else:
+            self._tools.move_to_end(api_key)
+        return tools
+
     async def verify_credentials(self, credentials: HTTPAuthorizationCredentials):
         return True
 
@@ -127,7 +256,7 @@ class OpenAIAPI():
             host=self.host,
             port=self.port,
             log_level="info",
-            loop="asyncio"
+            loop="auto"
         )
         self.server = uvicorn.Server(config)
         self.server.config.setup_event_loop()
@@ -147,11 +276,20 @@ class OpenAIAPI():
                 except Exception as e:
                     logger.error(f"Error during server shutdown: {e}")
 
+            self._tools.clear()
+            await self.http_client.aclose()
+
             for request_id in list(self.response_queues.keys()):
                 if request_id in self.response_queues:
                     await self.response_queues[request_id].put(None)
                     del self.response_queues[request_id]
 
 if __name__ == "__main__":
+    # serve on uvloop when it is installed, the stock asyncio loop otherwise
+    try:
+        from uvloop import run
+    except ImportError:
+        from asyncio import run
+
     api = OpenAIAPI(add_system_prompt=True, api_key=os.getenv("UNIFAI_API_KEY", ""))
-    asyncio.run(api.start())
+    run(api.start())
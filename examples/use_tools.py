@@ -8,23 +8,33 @@ import litellm
 import unifai
 from typing import List
 
+MODEL = "anthropic/claude-3-7-sonnet-20250219"
+
 async def run(msg: str, static_toolkits: List[str] | None = None, static_actions: List[str] | None = None):
     agent_api_key = os.getenv("UNIFAI_AGENT_API_KEY", "")
     tools = unifai.Tools(api_key=agent_api_key)
   
+    # Mark the tool definitions and the system prompt as Anthropic prompt cache breakpoints,
+    # so every turn of the tool loop reuses them instead of reprocessing them.
     available_tools = await tools.get_tools(
         dynamic_tools=True,
         static_toolkits=static_toolkits,
         static_actions=static_actions,
+        cache_control=MODEL.startswith("anthropic/"),
     )
+    system_prompt = unifai.Agent("").get_prompt("agent.system")
     messages: List = [
-        {"content": unifai.Agent("").get_prompt("agent.system"), "role": "system"},
+        (
+            {"content": [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}], "role": "system"}
+            if MODEL.startswith("anthropic/")
+            else {"content": system_prompt, "role": "system"}
+        ),
         {"content": msg, "role": "user"},
     ]
     
     while True:
         response = await litellm.acompletion(
-            model="anthropic/claude-3-7-sonnet-20250219",
+            model=MODEL,
             messages=messages,
             tools=available_tools,
         )
@@ -47,10 +57,14 @@ async def run(msg: str, static_toolkits: List[str] | None = None, static_actions
             ]
         )
 
-        results = await tools.call_tools(message.tool_calls) # type: ignore
-        if len(results) == 0:
+        results = []
+        async for result in tools.call_tools_as_completed(message.tool_calls, concurrency=10): # type: ignore
+            results.append(result)
+
+        if not results:
             break
 
+        print(f"Received {len(results)} tool results")
         messages.extend(results)
 
 if __name__ == "__main__":
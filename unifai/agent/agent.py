@@ -1,13 +1,15 @@
 from __future__ import annotations
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
+import heapq
 import litellm
 from litellm.exceptions import RateLimitError
 import logging
 import re
 import traceback
 import uuid
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
 from .model import ModelManager
 from .utils import (
@@ -34,18 +36,24 @@ from ..client.base import BaseClient, MessageContext, Message
 
 logger = logging.getLogger(__name__)
 
+# Fields of stored interaction messages that are replayed to the model as history.
+# Everything else litellm dumps (provider_specific_fields, function_call, audio, ...) is dropped.
+HISTORY_MESSAGE_FIELDS = ("role", "content", "name", "tool_calls", "tool_call_id")
+
 
 class Agent:
+    # Number of per-chat memory managers kept open, each one holds a Chroma client and collection
+    # handle. The embedding model and query embedding cache are shared between them.
+    MEMORY_MANAGER_CACHE_SIZE: int = 64
+
     def __init__(
         self,
         api_key: str,
         agent_id: str = "",
-        clients: List[BaseClient] = [],
-        chroma_config: ChromaConfig = ChromaConfig(
-            storage_type=StorageType.PERSISTENT,
-            persist_directory="./chroma_db",
-        ),
+        clients: Optional[List[BaseClient]] = None,
+        chroma_config: Optional[ChromaConfig] = None,
         tool_call_concurrency: int = 10,
+        max_concurrent_messages: int = 100,
     ):
         """Initialize an Agent instance.
 
@@ -57,6 +65,9 @@ class Agent:
             clients (List[BaseClient], optional): List of clients to handle different
                 communication channels (e.g., Telegram)
             chroma_config (ChromaConfig, optional): Configuration for the Chroma database.
+                Defaults to persistent storage in ./chroma_db.
+            max_concurrent_messages (int, optional): Maximum number of messages processed at the
+                same time across all channels. Messages within a channel are always processed in order.
         """
         self.api_key = api_key
         self._agent_id = agent_id
@@ -68,16 +79,21 @@ class Agent:
         self.tools = Tools(api_key=self.api_key)
         self.model_manager = ModelManager()
         self._stop_event = asyncio.Event()
-        self._tasks: List[asyncio.Task] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self._bg_tasks: Set[asyncio.Task] = set()
         self.model_timeout: float | None = 120
-
-        self._channel_locks: Dict[str, asyncio.Lock] = {}
+        # Token budget for replayed history, oldest interactions are dropped first
+        self.max_history_tokens: int | None = 6000
 
         self.fact_reflector = FactReflector(litellm.acompletion)
         self.goal_reflector = GoalReflector(litellm.acompletion)
 
-        self.memory_config = chroma_config
+        self.memory_config = chroma_config or ChromaConfig(
+            storage_type=StorageType.PERSISTENT,
+            persist_directory="./chroma_db",
+        )
         self.tool_call_concurrency = tool_call_concurrency
+        self._message_semaphore = asyncio.Semaphore(max_concurrent_messages)
 
         self._clients: Dict[str, BaseClient] = {}
         if clients:
@@ -85,6 +101,7 @@ class Agent:
                 self.add_client(client)
 
         self._channel_lock_manager = ChannelLockManager()
+        self._memory_managers: OrderedDict[str, ChromaMemoryManager] = OrderedDict()
 
     def set_ws_endpoint(self, endpoint):
         self.ws_uri = f"{endpoint}?type=player&api-key={self.api_key}"
@@ -225,8 +242,8 @@ class Agent:
         for client in self._clients.values():
             try:
                 await client.start()
-                self._tasks.append(
-                    asyncio.create_task(self._handle_client_messages(client))
+                self._track_task(
+                    self._tasks, asyncio.create_task(self._handle_client_messages(client))
                 )
                 logger.info(f"Started client: {client.client_id}")
             except Exception as e:
@@ -234,9 +251,10 @@ class Agent:
 
         await self._stop_event.wait()
 
-        for task in self._tasks:
+        for task in list(self._tasks):
             task.cancel()
         await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.drain()
 
         for client in self._clients.values():
             try:
@@ -245,8 +263,22 @@ class Agent:
             except Exception as e:
                 logger.error(f"Failed to stop client {client.client_id}: {e}")
 
+        try:
+            await self.tools.aclose()
+        except Exception as e:
+            logger.error(f"Failed to close tools client: {e}")
+
         logger.info("Agent has been stopped.")
 
+    async def drain(self):
+        """
+        Wait for background fact and goal reflection of already processed messages to be stored.
+        start() does this on shutdown, call it yourself when using process_message_with_memory
+        directly, before the event loop exits.
+        """
+        while self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+
     async def stop(self):
         """Stop the agent"""
         logger.info("Stopping the agent...")
@@ -258,13 +290,84 @@ class Agent:
         collection_base = f"{self._agent_id}-{user_id}-{chat_id}"
         collection_name = sanitize_collection_name(collection_base)
 
+        memory_manager = self._memory_managers.get(collection_name)
+        if memory_manager is not None:
+            self._memory_managers.move_to_end(collection_name)
+            return memory_manager
+
         config = ChromaConfig(
             storage_type=self.memory_config.storage_type,
             host=self.memory_config.host,
             port=self.memory_config.port,
             collection_name=collection_name,
         )
-        return ChromaMemoryManager(config)
+        memory_manager = ChromaMemoryManager(config)
+        self._memory_managers[collection_name] = memory_manager
+        if len(self._memory_managers) > self.MEMORY_MANAGER_CACHE_SIZE:
+            self._memory_managers.popitem(last=False)
+        return memory_manager
+
+    def _trim_history(self, model: str, history: List[List[Dict]]) -> List[List[Dict]]:
+        """
+        Drop the oldest interactions until the rest fit in max_history_tokens. The newest
+        interaction is always kept, with its tool results shortened if it doesn't fit alone.
+        """
+        if not self.max_history_tokens or not history:
+            return history
+        try:
+            token_counts = [
+                litellm.token_counter(model=model, messages=interaction_messages)
+                for interaction_messages in history
+            ]
+        except Exception as e:
+            logger.error(f"Error counting history tokens: {e}")
+            return history
+
+        start = 0
+        total_tokens = sum(token_counts)
+        while start < len(history) - 1 and total_tokens > self.max_history_tokens:
+            total_tokens -= token_counts[start]
+            start += 1
+        if start:
+            logger.info(f"Dropped {start} history interactions to fit {self.max_history_tokens} tokens")
+
+        history = history[start:]
+        if total_tokens > self.max_history_tokens:
+            history[-1] = self._truncate_tool_results(
+                model, history[-1], total_tokens - self.max_history_tokens
+            )
+        return history
+
+    def _truncate_tool_results(
+        self, model: str, interaction_messages: List[Dict], excess_tokens: int
+    ) -> List[Dict]:
+        """Shorten tool result contents proportionally to remove roughly excess_tokens"""
+        tool_tokens = {}
+        try:
+            for i, msg in enumerate(interaction_messages):
+                if msg.get("role") == "tool" and isinstance(msg.get("content"), str) and msg["content"]:
+                    tool_tokens[i] = litellm.token_counter(model=model, text=msg["content"])
+        except Exception as e:
+            logger.error(f"Error counting tool result tokens: {e}")
+            return interaction_messages
+
+        total_tool_tokens = sum(tool_tokens.values())
+        if not total_tool_tokens:
+            return interaction_messages
+
+        keep_ratio = max(0.0, 1 - excess_tokens / total_tool_tokens)
+        truncated = list(interaction_messages)
+        for i in tool_tokens:
+            content = truncated[i]["content"]
+            keep_chars = int(len(content) * keep_ratio)
+            truncated[i] = {**truncated[i], "content": content[:keep_chars] + "... [truncated]"}
+        logger.info(f"Truncated {len(tool_tokens)} tool results in the latest history interaction")
+        return truncated
+
+    @staticmethod
+    def _track_task(tasks: Set[asyncio.Task], task: asyncio.Task) -> None:
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
 
     def get_channel_lock(self, client_id: str, chat_id: str) -> asyncio.Lock:
         return self._channel_lock_manager.get_lock(client_id, chat_id)
@@ -283,13 +386,31 @@ class Agent:
         output_tokens = 0
         total_cost = 0
 
-        response, cost = await self.model_manager.chat_completion(
-            model=self.get_model("history"),
-            messages=[
-                {"role": "system", "content": self.get_prompt("agent.history")},
-                {"role": "user", "content": message},
-            ],
-            timeout=self.model_timeout,
+        async def get_relevant_memories() -> List[Memory]:
+            try:
+                return await memory_manager.get_memories(
+                    content=message,
+                    count=5,
+                    threshold=0.7,
+                    metadata={"type": {"$in": ["fact", "goal"]}},
+                )
+            except Exception as e:
+                logger.error(f"Error getting relevant memories: {e}")
+                logger.info("Proceeding without relevant memories")
+                return []
+
+        # The semantic memory lookup doesn't depend on the history decision, so it runs
+        # while the history model call is in flight.
+        (response, cost), relevant_memories = await asyncio.gather(
+            self.model_manager.chat_completion(
+                model=self.get_model("history"),
+                messages=[
+                    {"role": "system", "content": self.get_prompt("agent.history")},
+                    {"role": "user", "content": message},
+                ],
+                timeout=self.model_timeout,
+            ),
+            get_relevant_memories(),
         )
 
         if response is not None:
@@ -321,18 +442,6 @@ class Agent:
                 use_history = False
                 logger.info("Proceeding without history")
 
-        relevant_memories = []
-        try:
-            relevant_memories = await memory_manager.get_memories(
-                content=message,
-                count=5,
-                threshold=0.7,
-                metadata={"type": {"$in": ["fact", "goal"]}},
-            )
-        except Exception as e:
-            logger.error(f"Error getting relevant memories: {e}")
-            logger.info("Proceeding without relevant memories")
-
         model = self.get_model("default") or ""
         anthropic_cache_control = model.lower().startswith("anthropic")
 
@@ -340,50 +449,28 @@ class Agent:
             date=datetime.now().strftime("%Y-%m-%d"),
         )
 
-        system_messages = [{"type": "text", "text": system_prompt}]
-
-        if relevant_memories:
-            facts = []
-            goals = []
-            for mem in relevant_memories:
-                if mem.memory_type == MemoryType.FACT:
-                    facts.extend(mem.content.get("claims", []))
-                elif mem.memory_type == MemoryType.GOAL:
-                    goals.extend(mem.content.get("goals", []))
-
-            if facts:
-                system_messages.append(
-                    {
-                        "type": "text",
-                        "text": "Relevant facts:\n"
-                        + "\n".join([f"- {fact}" for fact in facts]),
-                    }
-                )
-
-            if goals:
-                system_messages.append(
-                    {
-                        "type": "text",
-                        "text": "Active goals:\n"
-                        + "\n".join([f"- {goal}" for goal in goals]),
-                    }
-                )
-
+        # Static content (system prompt, then history oldest-first) forms the prefix; the
+        # per-message memory block goes with the user turn at the tail so it never breaks
+        # the cached prefix.
+        system_messages: List[Dict] = [{"type": "text", "text": system_prompt}]
         if anthropic_cache_control:
-            system_messages[-1]["cache_control"] = {"type": "ephemeral"}
+            system_messages[0]["cache_control"] = {"type": "ephemeral"}
+
         messages: List = [{"role": "system", "content": system_messages}]
 
         if recent_memories:
-            recent_interactions = sorted(
+            recent_interactions = heapq.nlargest(
+                history_count,
                 recent_memories,
                 key=lambda x: x.metadata.get("timestamp", ""),
-                reverse=True,
-            )[:history_count]
+            )
 
-            recent_interactions = list(reversed(recent_interactions))
+            recent_interactions.reverse()
 
+            history: List[List[Dict]] = []
             for mem in recent_interactions:
                 if mem.content.get("interaction", {}).get("messages"):
+                    interaction_messages: List[Dict] = []
                     has_non_tool_message = False
                     for msg in mem.content["interaction"]["messages"]:
                         if msg.get("tool_calls"):
@@ -396,27 +483,65 @@ class Agent:
                                     is_valid_tool_call = False
                             if not is_valid_tool_call:
                                 continue
+                        history_msg = {
+                            k: msg[k] for k in HISTORY_MESSAGE_FIELDS if msg.get(k) is not None
+                        }
                         if msg.get("tool_call") != "tool":
                             has_non_tool_message = True
-                            messages.append(msg)
+                            interaction_messages.append(history_msg)
                         elif has_non_tool_message:
-                            messages.append(msg)
+                            interaction_messages.append(history_msg)
+                    if interaction_messages:
+                        history.append(interaction_messages)
+
+            for interaction_messages in self._trim_history(model, history):
+                messages.extend(interaction_messages)
+
+        if anthropic_cache_control and len(messages) > 1:
+            last_history = messages[-1]
+            if isinstance(last_history.get("content"), str) and last_history["content"]:
+                last_history["content"] = [{"type": "text", "text": last_history["content"]}]
+            if isinstance(last_history.get("content"), list) and last_history["content"]:
+                last_history["content"][-1]["cache_control"] = {"type": "ephemeral"}
+
+        user_content: List[Dict] = []
+        if relevant_memories:
+            facts = []
+            goals = []
+            for mem in relevant_memories:
+                if mem.memory_type == MemoryType.FACT:
+                    facts.extend(mem.content.get("claims", []))
+                elif mem.memory_type == MemoryType.GOAL:
+                    goals.extend(mem.content.get("goals", []))
 
-        messages.append(
-            {
-                "role": "user",
-                "content": [
+            if facts:
+                user_content.append(
                     {
                         "type": "text",
-                        "text": message,
+                        "text": "Relevant facts:\n"
+                        + "\n".join([f"- {fact}" for fact in facts]),
                     }
-                ],
-            }
-        )
+                )
+
+            if goals:
+                user_content.append(
+                    {
+                        "type": "text",
+                        "text": "Active goals:\n"
+                        + "\n".join([f"- {goal}" for goal in goals]),
+                    }
+                )
+
+        user_content.append({"type": "text", "text": message})
+        messages.append({"role": "user", "content": user_content})
         interaction = {"messages": [{"role": "user", "content": message}]}
         tool_infos_collection = []
         reply_messages = []
 
+        # The tool schema is fixed for the whole reply; fetching it once keeps the tools
+        # argument identical across iterations of the tool loop.
+        tool_schema = await self.tools.get_tools(cache_control=anthropic_cache_control)
+
         sent_using_tools = False
         while True:
             if anthropic_cache_control:
@@ -424,7 +549,7 @@ class Agent:
             response, cost = await self.model_manager.chat_completion(
                 model=model,
                 messages=messages,
-                tools=await self.tools.get_tools(cache_control=anthropic_cache_control),
+                tools=tool_schema,
                 parallel_tool_calls=True,
                 extra_headers=(
                     {"anthropic-beta": "token-efficient-tools-2025-02-19"}
@@ -527,11 +652,10 @@ class Agent:
         ctx: MessageContext,
         history_count: int = 1,
     ) -> tuple[List[Message], tuple[int, int]]:
-        message = ctx.message
-        user_id = ctx.user_id
-        chat_id = ctx.chat_id
-        memory_manager = self.get_memory_manager(user_id, chat_id)
-
+        """
+        Reply to a message and store it as memory. The interaction is stored before returning,
+        fact and goal reflection continues in the background, see drain().
+        """
         reply_messages, tool_infos, interaction_content, usage, cost = (
             await self.get_reply(client, ctx, history_count=history_count)
         )
@@ -539,10 +663,12 @@ class Agent:
         ctx.cost = cost
         await client.send_message(ctx, reply_messages)
 
-        reply_text = reply_messages[-1].get("content", "") if reply_messages else ""
+        message = ctx.message
+        user_id = ctx.user_id
+        chat_id = ctx.chat_id
+        memory_manager = self.get_memory_manager(user_id, chat_id)
 
-        user_uuid = generate_uuid_from_id(str(user_id))
-        agent_uuid = generate_uuid_from_id(self._agent_id)
+        reply_text = reply_messages[-1].get("content", "") if reply_messages else ""
 
         base_metadata = {
             "chat_id": str(chat_id),
@@ -551,6 +677,69 @@ class Agent:
             "has_tools": bool(tool_infos),
             "is_private": chat_id == user_id,
         }
+        if tool_infos:
+            base_metadata["tool_names"] = ",".join(t.name for t in tool_infos)
+
+        metadata = base_metadata.copy()
+        metadata.update({"type": "interaction", "message_length": len(message)})
+        interaction_memory = Memory(
+            id=uuid.uuid4(),
+            user_id=generate_uuid_from_id(str(user_id)),
+            agent_id=generate_uuid_from_id(self._agent_id),
+            content={
+                "text": f"User: {message}\nAssistant: {reply_text}",
+                "interaction": {"messages": interaction_content},
+            },
+            memory_type=MemoryType.INTERACTION,
+            metadata=metadata,
+            role=MemoryRole.SYSTEM,
+            tools=tool_infos if tool_infos else [],
+            unique=False,
+        )
+
+        # Stored while the channel lock is still held so the next message in this chat sees it
+        try:
+            await memory_manager.create_memory(interaction_memory)
+        except Exception as e:
+            logger.error(f"Error storing interaction memory for channel {chat_id}: {e}")
+
+        # Fact and goal reflection takes two more model calls, so it runs after the reply
+        self._track_task(
+            self._bg_tasks,
+            asyncio.create_task(
+                self._reflect_memories(ctx, reply_text, tool_infos, base_metadata)
+            ),
+        )
+
+        return reply_messages, usage
+
+    async def _reflect_memories(
+        self,
+        ctx: MessageContext,
+        reply_text: str,
+        tool_infos: List[ToolInfo],
+        base_metadata: Dict,
+    ) -> None:
+        async with self._message_semaphore:
+            try:
+                await self._store_reflections(ctx, reply_text, tool_infos, base_metadata)
+            except Exception as e:
+                logger.error(
+                    f"Error storing reflections for channel {ctx.chat_id}: {e}\n{traceback.format_exc()}"
+                )
+
+    async def _store_reflections(
+        self,
+        ctx: MessageContext,
+        reply_text: str,
+        tool_infos: List[ToolInfo],
+        base_metadata: Dict,
+    ) -> None:
+        message = ctx.message
+        memory_manager = self.get_memory_manager(ctx.user_id, ctx.chat_id)
+
+        user_uuid = generate_uuid_from_id(str(ctx.user_id))
+        agent_uuid = generate_uuid_from_id(self._agent_id)
 
         tasks = [
             self.fact_reflector.reflect(f"User: {message}\nAssistant: {reply_text}"),
@@ -559,15 +748,13 @@ class Agent:
 
         fact_result, goal_result = await asyncio.gather(*tasks)
 
-        memory_tasks = []
+        memories: List[Memory] = []
 
         if fact_result.success and fact_result.data and fact_result.data.get("claims"):
             metadata = base_metadata.copy()
             metadata.update(
                 {"type": "fact", "claims_count": len(fact_result.data["claims"])}
             )
-            if tool_infos:
-                metadata["tool_names"] = ",".join(t.name for t in tool_infos)
 
             fact_memory = Memory(
                 id=uuid.uuid4(),
@@ -583,15 +770,13 @@ class Agent:
                 tools=tool_infos if tool_infos else [],
                 unique=True,
             )
-            memory_tasks.append(memory_manager.create_memory(fact_memory))
+            memories.append(fact_memory)
 
         if goal_result.success and goal_result.data and goal_result.data.get("goals"):
             metadata = base_metadata.copy()
             metadata.update(
                 {"type": "goal", "goals_count": len(goal_result.data["goals"])}
             )
-            if tool_infos:
-                metadata["tool_names"] = ",".join(t.name for t in tool_infos)
 
             goal_memory = Memory(
                 id=uuid.uuid4(),
@@ -607,32 +792,10 @@ class Agent:
                 tools=tool_infos if tool_infos else [],
                 unique=True,
             )
-            memory_tasks.append(memory_manager.create_memory(goal_memory))
+            memories.append(goal_memory)
 
-        metadata = base_metadata.copy()
-        metadata.update({"type": "interaction", "message_length": len(message)})
-        if tool_infos:
-            metadata["tool_names"] = ",".join(t.name for t in tool_infos)
-        interaction_memory = Memory(
-            id=uuid.uuid4(),
-            user_id=user_uuid,
-            agent_id=agent_uuid,
-            content={
-                "text": f"User: {message}\nAssistant: {reply_text}",
-                "interaction": {"messages": interaction_content},
-            },
-            memory_type=MemoryType.INTERACTION,
-            metadata=metadata,
-            role=MemoryRole.SYSTEM,
-            tools=tool_infos if tool_infos else [],
-            unique=False,
-        )
-        memory_tasks.append(memory_manager.create_memory(interaction_memory))
-
-        if memory_tasks:
-            await asyncio.gather(*memory_tasks)
-
-        return reply_messages, usage
+        if memories:
+            await memory_manager.create_memories(memories)
 
     def add_client(self, client: BaseClient) -> None:
         """Add a new client to the agent"""
@@ -649,8 +812,9 @@ class Agent:
             try:
                 ctx = await client.receive_message()
                 if ctx:
-                    self._tasks.append(
-                        asyncio.create_task(self._process_channel_message(client, ctx))
+                    self._track_task(
+                        self._tasks,
+                        asyncio.create_task(self._process_channel_message(client, ctx)),
                     )
             except Exception as e:
                 logger.error(f"Error handling message from {client.client_id}: {e}")
@@ -659,9 +823,7 @@ class Agent:
         self, client: BaseClient, ctx: MessageContext
     ) -> None:
         """Process message within a channel"""
-        channel_lock = self.get_channel_lock(client.client_id, ctx.chat_id)
-
-        async with channel_lock:
+        async with self._channel_lock_manager.hold(client.client_id, ctx.chat_id), self._message_semaphore:
             try:
                 await self.process_message_with_memory(client, ctx)
             except Exception as e:
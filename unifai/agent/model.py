@@ -1,6 +1,8 @@
 import asyncio
-import datetime
 import logging
+import random
+import time
+from collections import deque
 import litellm
 from litellm.cost_calculator import completion_cost
 
@@ -8,10 +10,47 @@ logger = logging.getLogger(__name__)
 
 litellm.drop_params = True
 
+USAGE_STATS_KEYS = ('cached_tokens', 'input_tokens', 'output_tokens', 'cost')
+
+class _UsageWindow:
+    """Usage records from the last `hours` hours, with running totals kept up to date on add/expire."""
+
+    def __init__(self, hours):
+        self.span = hours * 3600.0
+        self.records = deque()
+        self.totals = [0] * len(USAGE_STATS_KEYS)
+
+    def add(self, record):
+        self.records.append(record)
+        for i, value in enumerate(record[1:]):
+            self.totals[i] += value
+
+    def expire(self, now):
+        cutoff = now - self.span
+        while self.records and self.records[0][0] <= cutoff:
+            record = self.records.popleft()
+            for i, value in enumerate(record[1:]):
+                self.totals[i] -= value
+        if not self.records:
+            # drop any float drift accumulated in the cost total
+            self.totals = [0] * len(USAGE_STATS_KEYS)
+
+    def stats(self):
+        return dict(zip(USAGE_STATS_KEYS, self.totals))
+
 class ModelManager:
+    # Retry delays grow exponentially up to RETRY_BACKOFF_MAX seconds, with "equal jitter"
+    # (half fixed, half random) so concurrent callers hitting a rate limit do not retry in lockstep.
+    RETRY_BACKOFF_BASE: float = 10.0
+    RETRY_BACKOFF_MAX: float = 60.0
+
     def __init__(self):
-        self.usage_history = []
         self.max_history_hours = 24
+        self._usage_windows = {
+            1: _UsageWindow(1),
+            self.max_history_hours: _UsageWindow(self.max_history_hours),
+        }
+        self.usage_history = self._usage_windows[self.max_history_hours].records
         self._chat_completion = litellm.acompletion
         self._completion_cost_calculator = completion_cost
 
@@ -27,14 +66,14 @@ class ModelManager:
         
         while attempt < retries:
             try:
-                response = await asyncio.wait_for(
-                    self._chat_completion(
-                        model=model,
-                        messages=messages,
-                        **kwargs
-                    ),
-                    timeout=timeout,
+                completion = self._chat_completion(
+                    model=model,
+                    messages=messages,
+                    **kwargs
                 )
+                if timeout is not None:
+                    completion = asyncio.wait_for(completion, timeout=timeout)
+                response = await completion
 
                 cached_tokens = response.usage.prompt_tokens_details.cached_tokens if response.usage.prompt_tokens_details else 0 # type: ignore
                 input_tokens = response.usage.prompt_tokens # type: ignore
@@ -43,20 +82,27 @@ class ModelManager:
                 try:
                     cost = self._completion_cost_calculator(response, model=model)
                 except Exception as e:
-                    logger.error(f'Error calculating cost: {e}')
+                    logger.error('Error calculating cost: %s', e)
 
                 try:
-                    logger.info(f'Cached tokens: {cached_tokens}, input tokens: {input_tokens}, output tokens: {output_tokens}, cost: {cost}')
-                    current_time = datetime.datetime.now()
-                    self.usage_history.append((current_time, cached_tokens, input_tokens, output_tokens, cost))
-                    cutoff_time = current_time - datetime.timedelta(hours=self.max_history_hours)
-                    self.usage_history = [stat for stat in self.usage_history if stat[0] > cutoff_time]
-                    stats = self.get_usage_stats(hours=1)
-                    logger.info(f'Last hour cached tokens: {stats["cached_tokens"]}, input tokens: {stats["input_tokens"]}, output tokens: {stats["output_tokens"]}, cost: {stats["cost"]}')
-                    stats = self.get_usage_stats(hours=24)
-                    logger.info(f'Last 24 hours cached tokens: {stats["cached_tokens"]}, input tokens: {stats["input_tokens"]}, output tokens: {stats["output_tokens"]}, cost: {stats["cost"]}')
+                    current_time = time.monotonic()
+                    record = (current_time, cached_tokens, input_tokens, output_tokens, cost)
+                    for window in self._usage_windows.values():
+                        window.add(record)
+                        window.expire(current_time)
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info('Cached tokens: %s, input tokens: %s, output tokens: %s, cost: %s', cached_tokens, input_tokens, output_tokens, cost)
+                        # Anthropic reports prompt cache writes and reads separately from cached_tokens
+                        cache_creation_tokens = getattr(response.usage, 'cache_creation_input_tokens', None) # type: ignore
+                        cache_read_tokens = getattr(response.usage, 'cache_read_input_tokens', None) # type: ignore
+                        if cache_creation_tokens or cache_read_tokens:
+                            logger.info('Cache creation tokens: %s, cache read tokens: %s', cache_creation_tokens or 0, cache_read_tokens or 0)
+                        stats = self.get_usage_stats(hours=1)
+                        logger.info('Last hour cached tokens: %s, input tokens: %s, output tokens: %s, cost: %s', stats["cached_tokens"], stats["input_tokens"], stats["output_tokens"], stats["cost"])
+                        stats = self.get_usage_stats(hours=24)
+                        logger.info('Last 24 hours cached tokens: %s, input tokens: %s, output tokens: %s, cost: %s', stats["cached_tokens"], stats["input_tokens"], stats["output_tokens"], stats["cost"])
                 except Exception as e:
-                    logger.error(f'Error updating usage stats: {e}')
+                    logger.error('Error updating usage stats: %s', e)
                 
                 return response, cost
                 
@@ -64,29 +110,26 @@ class ModelManager:
                 attempt += 1
                 last_error = e
                 if attempt < retries:
-                    wait_time = 10 * 2 ** attempt
-                    logger.warning(f"Attempt {attempt} failed with error: {e}. Retrying in {wait_time} seconds...")
+                    backoff = min(self.RETRY_BACKOFF_BASE * 2 ** attempt, self.RETRY_BACKOFF_MAX)
+                    wait_time = backoff / 2 + random.uniform(0, backoff / 2)
+                    logger.warning("Attempt %d failed with error: %s. Retrying in %.1f seconds...", attempt, e, wait_time)
                     await asyncio.sleep(wait_time)
                 else:
-                    logger.error(f"All {retries} attempts failed. Last error: {e}")
+                    logger.error("All %d attempts failed. Last error: %s", retries, e)
                     raise last_error
 
         return None, 0
 
     def get_usage_stats(self, hours=None):
         """Get usage statistics for the specified number of hours."""
-        if not self.usage_history:
-            return {'cached_tokens': 0, 'input_tokens': 0, 'output_tokens': 0, 'cost': 0}
-
-        if hours:
-            cutoff_time = datetime.datetime.now() - datetime.timedelta(hours=hours)
-            filtered_stats = [stat for stat in self.usage_history if stat[0] > cutoff_time]
-        else:
-            filtered_stats = self.usage_history
-
-        return {
-            'cached_tokens': sum(stat[1] for stat in filtered_stats),
-            'input_tokens': sum(stat[2] for stat in filtered_stats),
-            'output_tokens': sum(stat[3] for stat in filtered_stats),
-            'cost': sum(stat[4] for stat in filtered_stats),
-        }
+        now = time.monotonic()
+        for window in self._usage_windows.values():
+            window.expire(now)
+
+        window = self._usage_windows.get(hours or self.max_history_hours)
+        if window is not None:
+            return window.stats()
+
+        cutoff_time = now - hours * 3600.0
+        filtered_stats = [stat for stat in self.usage_history if stat[0] > cutoff_time]
+        return {key: sum(stat[i + 1] for stat in filtered_stats) for i, key in enumerate(USAGE_STATS_KEYS)}
@@ -1,13 +1,21 @@
 import datetime
+import functools
 import logging
 import os
 import yaml
 import uuid
 import asyncio
-from typing import Dict, Optional
+import contextlib
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Optional
 import re
 import hashlib
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 def load_prompt(prompt_path):
@@ -17,11 +25,12 @@ def load_prompt(prompt_path):
     prompts = load_prompt_file(file_name)
     return prompts.get(prompt_name, '')
 
+@functools.lru_cache(maxsize=None)
 def load_prompt_file(file_name):
     script_dir = os.path.dirname(os.path.abspath(__file__))
     prompts_path = os.path.join(script_dir, 'prompts', f'{file_name}.yaml')
     with open(prompts_path, 'r', encoding='utf-8') as file:
-        return yaml.safe_load(file)
+        return yaml.load(file, Loader=SafeLoader)
 
 def load_all_prompts():
     """
@@ -40,7 +49,7 @@ def load_all_prompts():
         if filename.endswith('.yaml'):
             file_name = os.path.splitext(filename)[0]
             try:
-                data = load_prompt_file(os.path.join(prompts_path, file_name))
+                data = load_prompt_file(file_name)
                 if isinstance(data, dict):
                     for key, value in data.items():
                         all_prompts[f"{file_name}.{key}"] = value
@@ -51,6 +60,7 @@ def load_all_prompts():
     
     return all_prompts
 
+@functools.lru_cache(maxsize=8192)
 def generate_uuid_from_id(id_str: str) -> uuid.UUID:
     """Generate a UUID from a string identifier."""
     return uuid.uuid5(uuid.NAMESPACE_DNS, id_str)
@@ -69,15 +79,22 @@ def get_collection_name(agent_id: str, user_id: str, chat_id: Optional[str] = No
     
     return sanitize_collection_name(collection_name)
 
+_INVALID_NAME_CHARS = re.compile(r'[^a-zA-Z0-9_-]')
+_REPEATED_DASHES = re.compile(r'-+')
+_LEADING_NON_ALNUM = re.compile(r'^[^a-zA-Z0-9]+')
+_TRAILING_NON_ALNUM = re.compile(r'[^a-zA-Z0-9]+$')
+_VALID_NAME = re.compile(r'^[a-zA-Z0-9].*[a-zA-Z0-9]$')
+
+@functools.lru_cache(maxsize=4096)
 def sanitize_collection_name(name: str) -> str:
     MAX_LENGTH = 63
     
-    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '-', name)
-    sanitized = re.sub(r'-+', '-', sanitized)
-    sanitized = re.sub(r'^[^a-zA-Z0-9]+', '', sanitized)
-    sanitized = re.sub(r'[^a-zA-Z0-9]+$', '', sanitized)
+    sanitized = _INVALID_NAME_CHARS.sub('-', name)
+    sanitized = _REPEATED_DASHES.sub('-', sanitized)
+    sanitized = _LEADING_NON_ALNUM.sub('', sanitized)
+    sanitized = _TRAILING_NON_ALNUM.sub('', sanitized)
     
-    if len(sanitized) < 3 or not re.match(r'^[a-zA-Z0-9].*[a-zA-Z0-9]$', sanitized):
+    if len(sanitized) < 3 or not _VALID_NAME.match(sanitized):
         sanitized = f"col-{sanitized}"
     
     if len(sanitized) > MAX_LENGTH:
@@ -88,12 +105,55 @@ def sanitize_collection_name(name: str) -> str:
     return sanitized
 
 class ChannelLockManager:
-    def __init__(self):
-        self._channel_locks: Dict[str, asyncio.Lock] = {}
-        
+    def __init__(self, max_locks: int = 10000):
+        self._channel_locks: OrderedDict[str, asyncio.Lock] = OrderedDict()
+        # Number of coroutines holding or waiting for each channel's lock via hold()
+        self._holders: Dict[str, int] = {}
+        self._max_locks = max_locks
+
     def get_lock(self, client_id: str, chat_id: str) -> asyncio.Lock:
-        """Get or create a lock for a specific channel"""
+        """
+        Get or create a lock for a specific channel. Use hold() to lock a channel, a lock that is
+        only obtained here can be evicted once it is among the least recently used.
+        """
+        lock = self._get_lock(f"{client_id}:{chat_id}")
+        self._evict_idle_locks()
+        return lock
+
+    @contextlib.asynccontextmanager
+    async def hold(self, client_id: str, chat_id: str) -> AsyncIterator[None]:
+        """Hold the lock of a channel, it is never evicted while held or waited for"""
         channel_key = f"{client_id}:{chat_id}"
-        if channel_key not in self._channel_locks:
-            self._channel_locks[channel_key] = asyncio.Lock()
-        return self._channel_locks[channel_key]
\ No newline at end of file
+        lock = self._get_lock(channel_key)
+        self._holders[channel_key] = self._holders.get(channel_key, 0) + 1
+        try:
+            self._evict_idle_locks()
+            async with lock:
+                yield
+        finally:
+            self._holders[channel_key] -= 1
+            if not self._holders[channel_key]:
+                del self._holders[channel_key]
+
+    def _get_lock(self, channel_key: str) -> asyncio.Lock:
+        lock = self._channel_locks.get(channel_key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._channel_locks[channel_key] = lock
+        else:
+            self._channel_locks.move_to_end(channel_key)
+        return lock
+
+    def _evict_idle_locks(self):
+        """Drop least recently used locks beyond capacity, skipping locks that are held or awaited"""
+        excess = len(self._channel_locks) - self._max_locks
+        if excess <= 0:
+            return
+        idle_keys = []
+        for channel_key in self._channel_locks:
+            if len(idle_keys) >= excess:
+                break
+            if channel_key not in self._holders:
+                idle_keys.append(channel_key)
+        for channel_key in idle_keys:
+            del self._channel_locks[channel_key]
@@ -98,10 +98,7 @@ class TwitterClient(BaseClient):
     @ensure_started
     async def receive_message(self) -> Optional[TwitterMessageContext]:
         """Receive a message from the queue"""
-        try:
-            return await asyncio.wait_for(self._message_queue.get(), timeout=None)
-        except asyncio.TimeoutError:
-            return None
+        return await self._message_queue.get()
 
     @ensure_started
     async def send_message(self, ctx: TwitterMessageContext, reply_messages: List[Message]):
@@ -116,7 +113,8 @@ class TwitterClient(BaseClient):
             reply_text = reply_text[:self.max_message_length-3] + "..."
 
         try:
-            self.client.create_tweet(
+            await asyncio.to_thread(
+                self.client.create_tweet,
                 text=reply_text,
                 in_reply_to_tweet_id=ctx.tweet_id
             )
@@ -147,7 +145,8 @@ class TwitterClient(BaseClient):
 
         while not self._stop_event.is_set():
             try:
-                tweets_resp = self.client.search_recent_tweets(
+                tweets_resp = await asyncio.to_thread(
+                    self.client.search_recent_tweets,
                     query=query,
                     expansions=["author_id"],
                     tweet_fields=["author_id", "text", "conversation_id"],
@@ -1,5 +1,5 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class APIError(Exception):
     """Exception raised for API errors with response details."""
@@ -9,28 +9,62 @@ class APIError(Exception):
         super().__init__(f"API error {status_code}: {response_json}")
 
 class API:
+    """
+    Thin wrapper around a pooled httpx.AsyncClient. The default httpx pool limits
+    throttle bursts of concurrent tool calls, override the class attributes to tune,
+    or pass in a shared client to reuse one connection pool across API instances.
+    """
     api_key: str
     api_uri: str
     client: httpx.AsyncClient
 
-    def __init__(self, api_key: str):
+    max_connections: int = 1000
+    max_keepalive_connections: int = 100
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 10.0
+
+    def __init__(self, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = api_key
-        self.client = httpx.AsyncClient()
+        self._owns_client = http_client is None
+        if http_client is not None:
+            self.client = http_client
+            return
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(30.0, connect=self.connect_timeout),
+        )
 
     def set_endpoint(self, endpoint: str):
         self.api_uri = endpoint
 
+    async def aclose(self):
+        """Close the underlying HTTP client and release pooled connections, unless it was passed in."""
+        if self._owns_client:
+            await self.client.aclose()
+
     async def request(
         self, 
         method: str,
         path: str, 
-        timeout: float = 10.0,
+        timeout: float | None = 10.0,
         headers: Dict[str, Any] | None = None,
         **kwargs,
     ) -> Dict[str, Any]:
         if headers is None:
             headers = {}
 
+        # A per-request timeout replaces the client's whole Timeout in httpx, so carry
+        # connect_timeout over. None uses the client's timeout as configured.
+        request_timeout = (
+            httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+            if timeout is not None
+            else httpx.USE_CLIENT_DEFAULT
+        )
+
         if 'Authorization' not in headers and self.api_key:
             headers['Authorization'] = self.api_key
 
@@ -38,7 +72,7 @@ class API:
             method,
             f"{self.api_uri}{path}", 
             headers=headers, 
-            timeout=timeout,
+            timeout=request_timeout,
             **kwargs,
         )
 
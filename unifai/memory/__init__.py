@@ -1,5 +1,4 @@
-from .base import Memory, ChromaConfig, StorageType, MemoryRole, MemoryType
-from .base import ChromaConfig, ToolInfo
+from .base import Memory, ChromaConfig, StorageType, MemoryRole, MemoryType, ToolInfo
 from .exceptions import (
     MemoryError,
     EmptyContentError,
@@ -1,4 +1,7 @@
 import asyncio
+import functools
+import logging
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any, Union, Sequence, cast, TypeVar, Mapping
 from uuid import UUID
 import chromadb
@@ -15,6 +18,8 @@ from .protocols import MemoryManager
 from .plugin import MemoryRankPlugin, PluginContext, MemoryContext
 from .utils import serialize_memory, deserialize_memory
 
+logger = logging.getLogger(__name__)
+
 T = TypeVar('T')
 EmbeddingType = Union[NDArray[np.float32], List[float], Sequence[float]]
 WhereType = Dict[str, Any]
@@ -22,6 +27,27 @@ MetadataType = Dict[str, Union[str, int, float, bool]]
 ChromaGetResult = Dict[str, Any]
 ChromaQueryResult = Dict[str, Any]
 
+# Query embeddings shared by all managers, keyed by embedding model and text. Kept small, it
+# only saves repeated lookups of the same text.
+QUERY_EMBEDDING_CACHE_SIZE: int = 256
+_query_embedding_cache: OrderedDict[tuple[str, str], List[float]] = OrderedDict()
+
+
+def _embedding_model_key(embedding_function: Any) -> str:
+    fn_type = type(embedding_function)
+    model_name = getattr(embedding_function, "model_name", None) or getattr(embedding_function, "MODEL_NAME", None)
+    if model_name is None:
+        # Unknown model, only share vectors with this exact instance
+        return f"{fn_type.__module__}.{fn_type.__qualname__}@{id(embedding_function)}"
+    return f"{fn_type.__module__}.{fn_type.__qualname__}:{model_name}"
+
+
+@functools.lru_cache(maxsize=None)
+def _default_embedding_function():
+    """One embedding model instance for all managers, each instance loads its own ONNX session"""
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
 
 class ChromaMemoryManager(MemoryManager):
     def __init__(self, config: ChromaConfig):
@@ -31,6 +57,7 @@ class ChromaMemoryManager(MemoryManager):
         
         try:
             self.embedding_function = self._get_embedding_function()
+            self._embedding_model_key = _embedding_model_key(self.embedding_function)
             self.collection = self._initialize_collection()
         except Exception as e:
             raise MemoryError(f"Failed to initialize memory manager: {str(e)}")
@@ -73,8 +100,7 @@ class ChromaMemoryManager(MemoryManager):
 
     def _get_embedding_function(self):
         try:
-            from chromadb.utils import embedding_functions
-            return embedding_functions.DefaultEmbeddingFunction()
+            return _default_embedding_function()
         except Exception as e:
             raise MemoryError(f"Failed to initialize embedding function: {str(e)}")
 
@@ -104,6 +130,27 @@ class ChromaMemoryManager(MemoryManager):
             return list(embedding)
         raise ValueError(f"Unsupported embedding type: {type(embedding)}")
 
+    def _embedding_at(self, embeddings: Any, idx: int) -> Optional[List[float]]:
+        """Pick one embedding from a Chroma result column, which may be a list or a numpy array"""
+        if embeddings is None or len(embeddings) <= idx or embeddings[idx] is None:
+            return None
+        return self._convert_embedding_to_list(embeddings[idx])
+
+    async def _embed_query(self, content: str) -> List[float]:
+        cache_key = (self._embedding_model_key, content)
+        embedding = _query_embedding_cache.get(cache_key)
+        if embedding is not None:
+            _query_embedding_cache.move_to_end(cache_key)
+            return embedding
+
+        embedding = self._convert_embedding_to_list(
+            (await asyncio.to_thread(self.embedding_function, [content]))[0]
+        )
+        _query_embedding_cache[cache_key] = embedding
+        if len(_query_embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+            _query_embedding_cache.popitem(last=False)
+        return embedding
+
     async def add_embedding_to_memory(self, memory: Memory) -> Memory:
         if memory.embedding:
             memory.embedding = self._convert_embedding_to_list(memory.embedding)
@@ -113,7 +160,7 @@ class ChromaMemoryManager(MemoryManager):
             raise EmptyContentError()
 
         try:
-            embedding = self.embedding_function([memory.content["text"]])[0]
+            embedding = (await asyncio.to_thread(self.embedding_function, [memory.content["text"]]))[0]
             memory.embedding = self._convert_embedding_to_list(embedding)
             return memory
         except Exception as e:
@@ -135,6 +182,36 @@ class ChromaMemoryManager(MemoryManager):
         except Exception as e:
             raise MemoryError(f"Failed to create memory: {str(e)}")
 
+    async def create_memories(self, memories: List[Memory]) -> None:
+        if not memories:
+            return
+        try:
+            missing = []
+            for memory in memories:
+                if memory.embedding:
+                    memory.embedding = self._convert_embedding_to_list(memory.embedding)
+                elif not memory.content.get("text"):
+                    raise EmptyContentError()
+                else:
+                    missing.append(memory)
+
+            if missing:
+                embeddings = await asyncio.to_thread(
+                    self.embedding_function, [memory.content["text"] for memory in missing]
+                )
+                for memory, embedding in zip(missing, embeddings):
+                    memory.embedding = self._convert_embedding_to_list(embedding)
+
+            await asyncio.to_thread(
+                self.collection.add,
+                ids=[str(memory.id) for memory in memories],
+                embeddings=[memory.embedding for memory in memories],
+                metadatas=[serialize_memory(memory) for memory in memories],
+                documents=[memory.content["text"] for memory in memories]
+            )
+        except Exception as e:
+            raise MemoryError(f"Failed to create memories: {str(e)}")
+
     async def _get_base_memories(
         self,
         content: str,
@@ -144,14 +221,11 @@ class ChromaMemoryManager(MemoryManager):
     ) -> List[Memory]:
         """Get base memories using content similarity and optional metadata filters"""
         try:
-            embedding = self.embedding_function([content])[0]
-            if isinstance(embedding, np.ndarray):
-                embedding = embedding.tolist()
             return await self._get_memories_with_filter(
                 where=where,
                 count=count,
                 threshold=threshold,
-                query_embedding=embedding if content.strip() else None
+                query_embedding=await self._embed_query(content) if content.strip() else None
             )
         except Exception as e:
             raise MemoryError(f"Failed to get base memories: {str(e)}")
@@ -207,7 +281,7 @@ class ChromaMemoryManager(MemoryManager):
                 result = await plugin.rerank(memories, context)
                 memories = result.memories
             except Exception as e:
-                print(f"Plugin {plugin.name} failed: {str(e)}")
+                logger.warning(f"Plugin {plugin.name} failed: {str(e)}")
                 continue
         return memories[:count]
 
@@ -223,13 +297,7 @@ class ChromaMemoryManager(MemoryManager):
                 return None
             
 
-            embedding = None
-            if "embeddings" in results and isinstance(results["embeddings"], list) and results["embeddings"]:
-                embedding_data = results["embeddings"][0]
-                if hasattr(embedding_data, 'tolist'):
-                    embedding = embedding_data.tolist()
-                elif isinstance(embedding_data, (list, np.ndarray)):
-                    embedding = list(embedding_data)
+            embedding = self._embedding_at(results.get("embeddings"), 0)
                 
             return deserialize_memory(
                 memory_id=results["ids"][0],
@@ -244,7 +312,7 @@ class ChromaMemoryManager(MemoryManager):
             metadata = serialize_memory(memory)
             
             if not isinstance(memory.embedding, (list, np.ndarray)) or len(memory.embedding) == 0:
-                embedding = self.embedding_function([memory.content["text"]])[0]
+                embedding = (await asyncio.to_thread(self.embedding_function, [memory.content["text"]]))[0]
                 memory.embedding = embedding.tolist() if hasattr(embedding, 'tolist') else list(embedding)
             
             current_embedding = memory.embedding
@@ -308,30 +376,46 @@ class ChromaMemoryManager(MemoryManager):
         threshold: float = 0.0,
     ) -> List[Memory]:
         try:
-            results = await asyncio.to_thread(
-                self.collection.get,
-                include=["metadatas", "embeddings"]
-            )
-            
-            if not results["ids"]:
-                return []
-            
+            # Older records only carry the legacy "type" key, which deserialize_memory falls back to.
+            # Records can also match on "type" alone while having a different memory_type, so the
+            # limit is applied after the check below, paging until enough memories match.
+            where = {"$or": [
+                {"memory_type": memory_type.value},
+                {"type": memory_type.value},
+            ]}
             memories = []
-            for idx, memory_id in enumerate(results["ids"]):
-                try:
-                    memory = deserialize_memory(
-                        memory_id=memory_id,
-                        metadata=results["metadatas"][idx],
-                        embedding=results["embeddings"][idx] if "embeddings" in results else None
-                    )
-                    
-                    if memory.memory_type == memory_type:
-                        memories.append(memory)
-                        
-                except Exception as e:
-                    print(f"Failed to deserialize memory {memory_id}: {str(e)}")
-                    continue
-                
+            offset = 0
+            while len(memories) < count:
+                results = await asyncio.to_thread(
+                    self.collection.get,
+                    where=where,
+                    limit=count,
+                    offset=offset,
+                    include=["metadatas", "embeddings"]
+                )
+
+                if not results["ids"]:
+                    break
+
+                for idx, memory_id in enumerate(results["ids"]):
+                    try:
+                        memory = deserialize_memory(
+                            memory_id=memory_id,
+                            metadata=results["metadatas"][idx],
+                            embedding=self._embedding_at(results.get("embeddings"), idx)
+                        )
+
+                        if memory.memory_type == memory_type:
+                            memories.append(memory)
+
+                    except Exception as e:
+                        logger.warning(f"Failed to deserialize memory {memory_id}: {str(e)}")
+                        continue
+
+                if len(results["ids"]) < count:
+                    break
+                offset += len(results["ids"])
+
             return memories[:count]
             
         except Exception as e:
@@ -397,13 +481,9 @@ class ChromaMemoryManager(MemoryManager):
                         continue
                 
                 embedding = None
-                if (isinstance(results.get("embeddings"), list) and 
-                    results["embeddings"] and 
-                    isinstance(results["embeddings"][0], list) and 
-                    len(results["embeddings"][0]) > idx):
-                    embedding_data = results["embeddings"][0][idx]
-                    if isinstance(embedding_data, (list, np.ndarray)):
-                        embedding = list(embedding_data)
+                embeddings = results.get("embeddings")
+                if embeddings is not None and len(embeddings) > 0:
+                    embedding = self._embedding_at(embeddings[0], idx)
                 
                 try:
                     
@@ -416,7 +496,7 @@ class ChromaMemoryManager(MemoryManager):
                     if similarity is None or similarity >= threshold:
                         memories.append(memory)
                 except Exception as e: 
-                    print(f"Failed to deserialize memory {memory_id}: {str(e)}")
+                    logger.warning(f"Failed to deserialize memory {memory_id}: {str(e)}")
                     continue
             
             return memories
@@ -449,11 +529,11 @@ class ChromaMemoryManager(MemoryManager):
                 memory = deserialize_memory(
                     memory_id=memory_id,
                     metadata=results["metadatas"][idx],
-                    embedding=results["embeddings"][idx] if "embeddings" in results else None
+                    embedding=self._embedding_at(results.get("embeddings"), idx)
                 )
                 memories.append(memory)
             except Exception as e:
-                print(f"Failed to deserialize memory {memory_id}: {str(e)}")
+                logger.warning(f"Failed to deserialize memory {memory_id}: {str(e)}")
                 continue
         
         memories.sort(key=lambda x: x.created_at, reverse=True)
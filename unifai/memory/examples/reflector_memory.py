@@ -33,6 +33,10 @@ persistent_config = ChromaConfig(
 )
 memory_manager = ChromaMemoryManager(persistent_config)
 
+# One user and one agent for the whole session, so stored memories can be attributed
+USER_ID = uuid.uuid4()
+AGENT_ID = uuid.uuid4()
+
 fact_reflector = FactReflector(litellm)
 goal_reflector = GoalReflector(litellm)
 
@@ -56,21 +60,22 @@ async def process_interaction(user_message: str, previous_memories: Optional[Lis
     messages = [{"content": system_prompt, "role": "system"}]
     
     if previous_memories:
-        memory_context = "Previous relevant information:\n"
-        for mem in previous_memories:
-            memory_context += f"- {mem.content['text']}\n"
+        memory_context = "Previous relevant information:\n" + "".join(
+            f"- {mem.content['text']}\n" for mem in previous_memories
+        )
         messages.append({"content": memory_context, "role": "system"})
     
     messages.append({"content": user_message, "role": "user"})
     
     interaction_content = []
     tool_infos_collection = []
+    tool_defs = await tools.get_tools()
     
     while True:
         response = await litellm.acompletion(
             model="openai/gpt-4o-mini",
             messages=messages,
-            tools=await tools.get_tools(),
+            tools=tool_defs,
         )
         
         assistant_message = response.choices[0].message
@@ -93,7 +98,7 @@ async def process_interaction(user_message: str, previous_memories: Optional[Lis
         ]
         tool_infos_collection.extend(tool_infos)
         
-        results = await tools.call_tools(assistant_message.tool_calls)
+        results = await tools.call_tools(assistant_message.tool_calls, concurrency=10)
         
         if not results:
             break
@@ -104,16 +109,19 @@ async def process_interaction(user_message: str, previous_memories: Optional[Lis
         messages.extend(results)
 
     full_interaction = "\n".join(interaction_content)
+    new_memories: List[Memory] = []
 
-    fact_result = await fact_reflector.reflect(full_interaction)
-    goal_result = await goal_reflector.reflect(full_interaction)
+    fact_result, goal_result = await asyncio.gather(
+        fact_reflector.reflect(full_interaction),
+        goal_reflector.reflect(full_interaction),
+    )
     if fact_result.success and fact_result.data is not None:
         facts = fact_result.data.get('claims', [])
         if facts:
             fact_memory = Memory(
                 id=uuid.uuid4(),
-                user_id=uuid.uuid4(),
-                agent_id=uuid.uuid4(),
+                user_id=USER_ID,
+                agent_id=AGENT_ID,
                 content={
                     "text": "Extracted facts from conversation",
                     "claims": facts
@@ -126,16 +134,15 @@ async def process_interaction(user_message: str, previous_memories: Optional[Lis
                 tools=tool_infos_collection if tool_infos_collection else None,
                 unique=True
             )
-            await memory_manager.create_memory(fact_memory)
-            print(f"Stored fact memory with ID: {fact_memory.id}")
+            new_memories.append(fact_memory)
 
     if goal_result.success and goal_result.data is not None:
         goals = goal_result.data.get('goals', [])
         if goals:
             goal_memory = Memory(
                 id=uuid.uuid4(),
-                user_id=uuid.uuid4(),
-                agent_id=uuid.uuid4(),
+                user_id=USER_ID,
+                agent_id=AGENT_ID,
                 content={
                     "text": "Goals and progress tracking",
                     "goals": goals
@@ -148,13 +155,12 @@ async def process_interaction(user_message: str, previous_memories: Optional[Lis
                 tools=tool_infos_collection if tool_infos_collection else None,
                 unique=True
             )
-            await memory_manager.create_memory(goal_memory)
-            print(f"Stored goal memory with ID: {goal_memory.id}")
+            new_memories.append(goal_memory)
 
     interaction_memory = Memory(
         id=uuid.uuid4(),
-        user_id=uuid.uuid4(),
-        agent_id=uuid.uuid4(),
+        user_id=USER_ID,
+        agent_id=AGENT_ID,
         content={
             "text": full_interaction
         },
@@ -162,8 +168,11 @@ async def process_interaction(user_message: str, previous_memories: Optional[Lis
         tools=tool_infos_collection if tool_infos_collection else None,
         unique=False
     )
-    await memory_manager.create_memory(interaction_memory)
-    print(f"Stored interaction memory with ID: {interaction_memory.id}")
+    new_memories.append(interaction_memory)
+
+    await memory_manager.create_memories(new_memories)
+    for memory in new_memories:
+        print(f"Stored {memory.memory_type.value} memory with ID: {memory.id}")
     
 async def test_reflector_memory():
     print("\nTesting reflector memory system...")
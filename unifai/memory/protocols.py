@@ -29,6 +29,10 @@ class MemoryManager(Protocol):
     async def create_memory(self, memory: Memory) -> None:
         raise NotImplementedError
 
+    async def create_memories(self, memories: List[Memory]) -> None:
+        """Create several memories with one batched embedding call and write"""
+        raise NotImplementedError
+
     async def get_memories(
         self,
         content: str,
@@ -35,16 +35,19 @@ class ToolSimilarityPlugin(MemoryRankPlugin[ToolSimilarityConfig]):
             return 0.0
             
         m, n = len(seq1), len(seq2)
-        dp = [[0] * (n + 1) for _ in range(m + 1)]
+        # only the previous row of the LCS table is needed, keep two rows instead of m + 1
+        prev = [0] * (n + 1)
+        curr = [0] * (n + 1)
         
-        for i in range(1, m + 1):
+        for item in seq1:
             for j in range(1, n + 1):
-                if seq1[i-1] == seq2[j-1]:
-                    dp[i][j] = dp[i-1][j-1] + 1
+                if item == seq2[j-1]:
+                    curr[j] = prev[j-1] + 1
                 else:
-                    dp[i][j] = max(dp[i-1][j], dp[i][j-1])
+                    curr[j] = max(prev[j], curr[j-1])
+            prev, curr = curr, prev
                     
-        lcs_length = dp[m][n]
+        lcs_length = prev[n]
         return 2.0 * lcs_length / (m + n)  
     
     async def calculate_scores(
@@ -71,6 +74,8 @@ class ToolSimilarityPlugin(MemoryRankPlugin[ToolSimilarityConfig]):
         
         if not context_tools:
             return {str(memory.id): 0.0 for memory in memories}
+
+        recency_rank = {recent.id: idx for idx, recent in enumerate(recent_memories)}
             
         for memory in memories:
             memory_id = str(memory.id)
@@ -100,12 +105,9 @@ class ToolSimilarityPlugin(MemoryRankPlugin[ToolSimilarityConfig]):
                 base_score += sequence_sim * self.config.sequence_bonus
 
             if memory.created_at:
-                recency_factor = 1.0
-                for idx, recent in enumerate(recent_memories):
-                    if memory.id == recent.id:
-                        recency_factor = 1.0 - (idx * self.config.recency_weight)
-                        break
-                base_score *= recency_factor
+                idx = recency_rank.get(memory.id)
+                if idx is not None:
+                    base_score *= 1.0 - (idx * self.config.recency_weight)
                 
             scores[memory_id] = min(base_score, 1.0)
                 
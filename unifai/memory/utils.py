@@ -1,12 +1,26 @@
 from typing import List, Any, Dict, Optional
 from datetime import datetime
 from uuid import UUID
-import json
 from enum import Enum
+import json
+import orjson
 from .base import Memory, MemoryRole, ToolInfo, MemoryType
-from pydantic import TypeAdapter
 import uuid
 
+# Metadata keys that map onto Memory fields rather than into Memory.metadata
+_RESERVED_METADATA_KEYS = frozenset({
+    "user_id", "agent_id", "memory_type", "role",
+    "content_text", "created_at", "unique", "tools",
+    "chat_id", "type", "content"
+})
+
+def _dumps(obj: Any) -> str:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        # orjson can't serialize integers beyond 64 bits, stdlib json can
+        return json.dumps(obj)
+
 def serialize_memory(memory: Memory) -> Dict[str, Any]:
     """Serialize memory to metadata format for Chroma storage"""
     metadata = {
@@ -18,10 +32,10 @@ def serialize_memory(memory: Memory) -> Dict[str, Any]:
         "created_at": memory.created_at.isoformat(),
         "unique": memory.unique,
         **{k: str(v) for k, v in memory.metadata.items()},
-        **({"tools": json.dumps([t.model_dump() for t in memory.tools])} if memory.tools else {})
+        **({"tools": _dumps([t.model_dump() for t in memory.tools])} if memory.tools else {})
     }
 
-    metadata["content"] = json.dumps(memory.content)
+    metadata["content"] = _dumps(memory.content)
     return metadata
 
 def deserialize_memory(
@@ -40,11 +54,12 @@ def deserialize_memory(
     tools = None
     if "tools" in metadata:
         try:
-            tools = json.loads(metadata.pop("tools"))
+            tools = json.loads(metadata["tools"])
         except json.JSONDecodeError:
             tools = None
 
     try:
+        # stdlib json keeps integers beyond 64 bits exact, orjson turns them into floats
         content = json.loads(metadata["content"])
     except (json.JSONDecodeError, KeyError):
         content = {
@@ -65,12 +80,8 @@ def deserialize_memory(
         "similarity": similarity,
         "metadata": {
             k: v for k, v in metadata.items()
-            if k not in {
-                "user_id", "agent_id", "memory_type", "role", 
-                "content_text", "created_at", "unique", "tools",
-                "chat_id", "type", "content"
-            }
+            if k not in _RESERVED_METADATA_KEYS
         }
     }
 
-    return TypeAdapter(Memory).validate_python(memory_data)
\ No newline at end of file
+    return Memory.model_validate(memory_data)
\ No newline at end of file
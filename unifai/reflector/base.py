@@ -1,7 +1,24 @@
 from abc import ABC
 from typing import List, Any
+import orjson
 from .types import ReflectionExample, ReflectionResult
 
+def parse_json_response(text: str) -> Any:
+    """
+    Parse a JSON model response. Responses are requested as bare JSON objects, so markdown
+    code fences are only stripped when the direct parse fails.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        stripped = text.strip()
+        if stripped[:3] != "```" or stripped[-3:] != "```":
+            raise
+        stripped = stripped[3:-3]
+        if stripped[:4] == "json":
+            stripped = stripped[4:]
+        return orjson.loads(stripped)
+
 class BaseReflector(ABC):
     def __init__(
         self,
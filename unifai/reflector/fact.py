@@ -1,7 +1,6 @@
 from typing import Dict, Any, Callable, Awaitable, List
-from .base import BaseReflector
+from .base import BaseReflector, parse_json_response
 from .types import ReflectionType, ReflectionResult
-import json
 
 class FactReflector(BaseReflector):
     def __init__(
@@ -55,7 +54,7 @@ class FactReflector(BaseReflector):
             )
             
             llm_response = response.choices[0].message.content
-            llm_data = json.loads(llm_response)
+            llm_data = parse_json_response(llm_response)
             
             return ReflectionResult(success=True, data={
                 "type": ReflectionType.FACT.value,
@@ -1,7 +1,7 @@
 from typing import List, Dict, Any, Callable, Awaitable
-from .base import BaseReflector
+from .base import BaseReflector, parse_json_response
 from .types import ReflectionType, ReflectionResult
-import json
+import orjson
 
 class GoalReflector(BaseReflector):
     def __init__(
@@ -61,14 +61,14 @@ class GoalReflector(BaseReflector):
             )
             
             llm_response = response.choices[0].message.content
-            llm_data = json.loads(llm_response)
+            llm_data = parse_json_response(llm_response)
             
             return ReflectionResult(
                 success=True,
                 data=llm_data
             )
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             return ReflectionResult(
                 success=False,
                 data=None,
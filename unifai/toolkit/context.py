@@ -60,7 +60,4 @@ class ActionContext:
                 payment=result.payment,
             )
         )
-        if self.toolkit._ws:
-            await self.toolkit._ws.send(action_result_message.model_dump_json())
-        else:
-            raise RuntimeError("WebSocket is not connected")
+        await self.toolkit._send(action_result_message.model_dump_json())
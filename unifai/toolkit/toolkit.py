@@ -2,8 +2,9 @@ import asyncio
 import inspect
 import json
 import logging
+import random
 from enum import Enum
-from typing import Callable, Dict, Any, Optional, Union, Coroutine
+from typing import Callable, Dict, Any, Optional, Set, Union, Coroutine
 from pydantic import ValidationError, BaseModel
 from websockets import connect, ConnectionClosedError
 from websockets.asyncio.client import ClientConnection
@@ -28,6 +29,8 @@ class ActionHandler(BaseModel):
     action_description: str | dict
     payload_description: str | dict 
     payment_description: str | dict
+    num_params: int
+    is_coroutine: bool
 
     class Config:
         arbitrary_types_allowed = True
@@ -41,17 +44,39 @@ class Toolkit:
     _reconnect_interval: float = 5
     _reconnect: bool = True
     _api: ToolkitAPI
+    _send_queue: Optional[asyncio.Queue[str]] = None
+    _register_actions_message: Optional[str] = None
 
-    def __init__(self, api_key: str, reconnect_interval: float = 5):
+    # Outgoing messages are queued and written by a dedicated task, so a slow socket
+    # only blocks senders once this many messages are waiting.
+    SEND_QUEUE_SIZE: int = 1000
+
+    # Truncated exponential backoff between reconnection attempts. The first retry
+    # after a healthy connection drops waits a random delay up to the reconnect
+    # interval, subsequent retries grow by BACKOFF_FACTOR up to BACKOFF_MAX.
+    BACKOFF_MIN: float = 1.92
+    BACKOFF_MAX: float = 60.0
+    BACKOFF_FACTOR: float = 1.618
+
+    def __init__(self, api_key: str, reconnect_interval: float = 5, max_concurrent_actions: int = 1):
         """
         A collection of tools (actions) that can be searched and called by agents.
 
         :param api_key: the API key of your toolkit.
-        :param reconnect_interval: Time in seconds between reconnection attempts.
+        :param reconnect_interval: Upper bound in seconds of the randomized delay before the first
+                                   reconnection attempt. Further attempts back off exponentially.
+        :param max_concurrent_actions: Maximum number of action handlers running at the same time.
+                                       The default of 1 handles actions one at a time in the order
+                                       they arrive; raise it only if your handlers are safe to run
+                                       concurrently.
         """
+        if max_concurrent_actions < 1:
+            raise ValueError("max_concurrent_actions must be at least 1")
         self._api_key = api_key
         self._reconnect_interval = reconnect_interval
         self._api = ToolkitAPI(api_key)
+        self._action_tasks: Set[asyncio.Task] = set()
+        self._action_semaphore = asyncio.Semaphore(max_concurrent_actions)
         self.set_api_endpoint(FRONTEND_API_ENDPOINT)
         self.set_ws_endpoint(BACKEND_WS_ENDPOINT)
 
@@ -80,8 +105,11 @@ class Toolkit:
                 func=func,
                 action_description=action_description,
                 payload_description=payload_description,
-                payment_description=payment_description
+                payment_description=payment_description,
+                num_params=len(inspect.signature(func).parameters),
+                is_coroutine=inspect.iscoroutinefunction(func),
             )
+            self._register_actions_message = None
             return func
         return decorator
 
@@ -102,19 +130,20 @@ class Toolkit:
                 action_name=action_name
             )
 
-            payload = action_data.payload or {}
-            payment = action_data.payment
-
-            if isinstance(payload, str):
-                try:
-                    payload = json.loads(payload)
-                except Exception as e:
-                    pass
+            args: list = [ctx] if action_handler.num_params >= 1 else []
+            if action_handler.num_params >= 2:
+                payload = action_data.payload or {}
+                if isinstance(payload, str):
+                    try:
+                        payload = json.loads(payload)
+                    except Exception as e:
+                        pass
+                args.append(payload)
+            if action_handler.num_params >= 3:
+                args.append(action_data.payment)
 
-            num_params = len(inspect.signature(action_handler.func).parameters)
             try:
-                args = [ctx, payload, payment][:num_params]
-                if asyncio.iscoroutinefunction(action_handler.func):
+                if action_handler.is_coroutine:
                     result = await action_handler.func(*args)
                 else:
                     result = action_handler.func(*args)
@@ -132,13 +161,47 @@ class Toolkit:
         else:
             logger.warning(f"No handler for action '{action_name}'")
 
+    def _get_register_actions_message(self) -> str:
+        """
+        Serialized registerActions message, rebuilt only after the set of actions changes.
+        """
+        if self._register_actions_message is None:
+            actions_data = {
+                action: ActionDescription(
+                    description=handler.action_description,
+                    payload=handler.payload_description,
+                    payment=handler.payment_description
+                )
+                for action, handler in self._action_handlers.items()
+            }
+
+            self._register_actions_message = ToolkitToServerMessage(
+                type=ToolkitToServerMessageType.REGISTER_ACTIONS,
+                data=RegisterActionsMessageData(actions=actions_data).model_dump(),
+            ).model_dump_json()
+        return self._register_actions_message
+
+    async def _send(self, message: str):
+        """
+        Queue a message to be sent over the current connection.
+        """
+        if self._send_queue is None:
+            raise RuntimeError("WebSocket is not connected")
+        await self._send_queue.put(message)
+
+    async def _write_messages(self, ws: ClientConnection, queue: asyncio.Queue[str]):
+        while True:
+            message = await queue.get()
+            await ws.send(message)
+
     async def _handle_messages(self):
         while True:
             assert self._ws
 
-            message = await self._ws.recv()
+            # pydantic parses the raw frame bytes, so skip the utf-8 decode to str
+            message = await self._ws.recv(decode=False)
 
-            logger.debug(f"Received raw message: {message}")
+            logger.debug("Received raw message: %s", message)
 
             try:
                 msg = ServerToToolkitMessage.model_validate_json(message)
@@ -155,43 +218,60 @@ class Toolkit:
                 except ValidationError as e:
                     logger.warning(f"Action message validation error: {e}")
                     continue
-                await self._handle_action(action_data)
+                # Reading pauses while max_concurrent_actions handlers are running, so the socket
+                # keeps its backpressure instead of piling up pending tasks
+                await self._action_semaphore.acquire()
+                task = asyncio.create_task(self._handle_action(action_data))
+                self._action_tasks.add(task)
+                task.add_done_callback(self._on_action_done)
+
+    def _on_action_done(self, task: asyncio.Task):
+        self._action_tasks.discard(task)
+        self._action_semaphore.release()
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to complete action: {task.exception()}")
 
     async def _connect(self):
+        backoff_delay = None
         while self._reconnect:
             try:
                 async with connect(self._ws_uri) as ws:
                     self._ws = ws
+                    backoff_delay = None
 
                     logger.info("WebSocket connection established.")
 
-                    actions_data = {
-                        action: ActionDescription(
-                            description=handler.action_description,
-                            payload=handler.payload_description,
-                            payment=handler.payment_description
-                        )
-                        for action, handler in self._action_handlers.items()
-                    }
-
-                    set_actions_message = ToolkitToServerMessage(
-                        type=ToolkitToServerMessageType.REGISTER_ACTIONS,
-                        data=RegisterActionsMessageData(actions=actions_data).model_dump(),
-                    )
-
-                    await self._ws.send(set_actions_message.model_dump_json())
-
-                    if EventType.ON_READY in self._event_handlers:
-                        await self._event_handlers[EventType.ON_READY]()
-
-                    await self._handle_messages()
+                    self._send_queue = asyncio.Queue(maxsize=self.SEND_QUEUE_SIZE)
+                    writer = asyncio.create_task(self._write_messages(ws, self._send_queue))
+                    reader = None
+                    try:
+                        await self._send(self._get_register_actions_message())
+
+                        if EventType.ON_READY in self._event_handlers:
+                            await self._event_handlers[EventType.ON_READY]()
+
+                        reader = asyncio.create_task(self._handle_messages())
+                        done, _ = await asyncio.wait({reader, writer}, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            task.result()
+                    finally:
+                        self._send_queue = None
+                        writer.cancel()
+                        if reader:
+                            reader.cancel()
             except ConnectionClosedError:
                 logger.warning("Connection closed")
             except Exception as e:
                 logger.warning(f"An error occurred: {e}")
             finally:
-                logger.info(f"Reconnecting in {self._reconnect_interval} seconds...")
-                await asyncio.sleep(self._reconnect_interval)
+                if backoff_delay is None:
+                    delay = random.random() * self._reconnect_interval
+                    backoff_delay = self.BACKOFF_MIN
+                else:
+                    delay = backoff_delay
+                    backoff_delay = min(backoff_delay * self.BACKOFF_FACTOR, self.BACKOFF_MAX)
+                logger.info(f"Reconnecting in {delay:.1f} seconds...")
+                await asyncio.sleep(delay)
 
     async def run(self):
         """
@@ -1,8 +1,11 @@
 import asyncio
+import httpx
 import json
 import logging
+import orjson
+import time
 from enum import Enum
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from pydantic import BaseModel
 from ..common.const import BACKEND_API_ENDPOINT
 from .api import ToolsAPI
@@ -99,23 +102,51 @@ tool_list: List[Tool] = [
     ) for function in function_list
 ]
 
+# The built-in tools never change, so serialize them once instead of on every get_tools call
+tool_list_json: List[Dict[str, Any]] = [tool.model_dump(mode="json") for tool in tool_list]
+
+def _dumps(obj: Any) -> str:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        # orjson can't serialize integers beyond 64 bits, stdlib json can
+        return json.dumps(obj)
+
 class Tools:
     """
     A class to interact with the Unifai Tools API.
     """
+    # Seconds a get_tools result is reused before static tools are fetched again
+    TOOLS_CACHE_TTL: float = 300
+
     _api_key: str
     _api: ToolsAPI
+    _function_handlers: Dict[str, Callable[[dict], Awaitable[Any]]]
+    _tools_cache: Dict[Tuple, Tuple[float, List[Dict[str, Any]]]]
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
         """
         :param api_key: the API key of your toolkit.
+        :param http_client: Optional shared httpx.AsyncClient to send requests with. It is not closed by aclose().
         """
         self._api_key = api_key
-        self._api = ToolsAPI(api_key)
+        self._api = ToolsAPI(api_key, http_client=http_client)
+        self._function_handlers = {
+            FunctionName.SEARCH_TOOLS.value: self._api.search_tools,
+            FunctionName.CALL_TOOL.value: self._api.call_tool,
+        }
+        self._tools_cache = {}
         self.set_api_endpoint(BACKEND_API_ENDPOINT)
 
     def set_api_endpoint(self, endpoint: str):
         self._api.set_endpoint(endpoint)
+        self._tools_cache.clear()
+
+    async def aclose(self):
+        """
+        Close the underlying HTTP connection pool.
+        """
+        await self._api.aclose()
 
     async def _fetch_static_tools(
         self,
@@ -148,7 +179,7 @@ class Tools:
                     # TODO: consider using schema dict directly if it's a valid json schema
 
                     if isinstance(payload_schema, dict):
-                        payload_schema = json.dumps(payload_schema)
+                        payload_schema = _dumps(payload_schema)
 
                     try:
                         parameters={
@@ -221,13 +252,38 @@ class Tools:
         :param static_toolkits: List of static toolkits to include that will be exposed directly as tools
         :param static_actions: List of static actions to include that will be exposed directly as tools
         :param cache_control: Whether to include cache control
+
+        Results are cached for TOOLS_CACHE_TTL seconds, each call returns a new list.
         """
-        tools = await self._get_tools(dynamic_tools, static_toolkits, static_actions)
-        tools_json = [tool.model_dump(mode="json") for tool in tools]
+        cache_key = (
+            dynamic_tools,
+            tuple(static_toolkits or ()),
+            tuple(static_actions or ()),
+            cache_control,
+        )
+        cached = self._tools_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self.TOOLS_CACHE_TTL:
+            return [dict(tool) for tool in cached[1]]
+
+        tools_json: List[Dict[str, Any]] = []
+        cacheable = True
+
+        if dynamic_tools:
+            tools_json.extend(dict(tool) for tool in tool_list_json)
+
+        if static_toolkits or static_actions:
+            static_tools = await self._fetch_static_tools(static_toolkits, static_actions)
+            tools_json.extend(tool.model_dump(mode="json") for tool in static_tools)
+            # An empty result usually means the fetch failed, try again next time
+            cacheable = bool(static_tools)
 
         if cache_control and tools_json:
             tools_json[-1]["cache_control"] = {"type": "ephemeral"}
-        
+
+        if cacheable:
+            self._tools_cache[cache_key] = (time.monotonic(), tools_json)
+            return [dict(tool) for tool in tools_json]
+
         return tools_json
 
     async def call_tool(self, name: str | FunctionName, arguments: dict | str) -> Any:
@@ -239,20 +295,20 @@ class Tools:
         :return: The result of the function call
         """
         name = name if isinstance(name, str) else name.value
+        # stdlib json keeps integers beyond 64 bits (e.g. wei amounts) exact, orjson turns them into floats
         args = json.loads(arguments) if isinstance(arguments, str) else arguments
         
-        if name == FunctionName.SEARCH_TOOLS.value:
-            return await self._api.search_tools(args)
-        elif name == FunctionName.CALL_TOOL.value:
-            return await self._api.call_tool(args)
-        else:
-            try:
-                return await self._api.call_tool({
-                    "action": name,
-                    **args,
-                })
-            except Exception as e:
-                raise ValueError(f"Failed to call tool {name}: {e}")
+        handler = self._function_handlers.get(name)
+        if handler:
+            return await handler(args)
+
+        try:
+            return await self._api.call_tool({
+                "action": name,
+                **args,
+            })
+        except Exception as e:
+            raise ValueError(f"Failed to call tool {name}: {e}")
 
     async def _sem_call_tool(self, name: str, arguments: dict | str, tool_call_id: str, semaphore: asyncio.Semaphore) -> Optional[OpenAIToolResult]:
         async with semaphore:
@@ -265,7 +321,7 @@ class Tools:
             return OpenAIToolResult(
                 role="tool",
                 tool_call_id=tool_call_id,
-                content=json.dumps(result),
+                content=_dumps(result),
             )
 
     async def call_tools(self, tool_calls: Optional[List[OpenAIToolCall]], concurrency: int = 1) -> List[dict[str, Any]]:
@@ -287,3 +343,31 @@ class Tools:
         ]
         results = await asyncio.gather(*tasks)
         return [result.model_dump(mode="json") for result in results if result is not None]
+
+    async def call_tools_as_completed(self, tool_calls: Optional[List[OpenAIToolCall]], concurrency: int = 1) -> AsyncIterator[dict[str, Any]]:
+        """
+        Call multiple tools like call_tools, but yield each result as soon as its tool call finishes
+        instead of waiting for all of them. Results are yielded in completion order, use their
+        tool_call_id to match them to the tool calls.
+
+        :param tool_calls: List of OpenAI tool call objects containing function name and arguments
+        :param concurrency: The maximum number of concurrent tool calls
+        :return: Async iterator of results from each tool call
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [
+            asyncio.create_task(self._sem_call_tool(
+                tool_call.function.name,
+                tool_call.function.arguments,
+                tool_call.id,
+                semaphore
+            )) for tool_call in tool_calls or []
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                if result is not None:
+                    yield result.model_dump(mode="json")
+        finally:
+            for task in tasks:
+                task.cancel()